@@ -10,6 +10,7 @@ from hyp3lib.aws import upload_file_to_s3
 from hyp3lib.fetch import write_credentials_to_netrc_file
 
 from hyp3_mintpy.process import process_mintpy
+from hyp3_mintpy.runner import PROFILES
 
 
 def main() -> None:
@@ -28,6 +29,47 @@ def main() -> None:
     )
     parser.add_argument('--start-date', type=str, help='Start date for the timeseries (YYYY-MM-DD)')
     parser.add_argument('--end-date', type=str, help='End date for the timeseries (YYYY-MM-DD)')
+    parser.add_argument(
+        '--mintpy-profile',
+        default='default',
+        choices=list(PROFILES),
+        help='MintPy processing profile, fast turns off optional corrections and plotting',
+    )
+    parser.add_argument('--disk-budget', type=float, help='Maximum scratch disk usage in GB', required=False)
+    parser.add_argument(
+        '--scratch-dir', help='Fast scratch location (e.g. tmpfs or local NVMe) for the MintPy working directory'
+    )
+
+    parser.add_argument(
+        '--tiles',
+        type=int,
+        nargs=2,
+        metavar=('ROWS', 'COLUMNS'),
+        help='Split the frame into ROWS x COLUMNS overlapping tiles processed concurrently and stitched together',
+    )
+    parser.add_argument(
+        '--tile-overlap',
+        default=0.1,
+        type=float,
+        help='Width of the strip shared by neighbouring tiles as a fraction of the tile size',
+    )
+    parser.add_argument('--tile-workers', type=int, help='Number of tiles processed at the same time')
+
+    parser.add_argument(
+        '--min-mean-coherence', type=float, help='Drop interferograms with a lower mean coherence before processing'
+    )
+    parser.add_argument(
+        '--min-median-coherence', type=float, help='Drop interferograms with a lower median coherence before processing'
+    )
+    parser.add_argument(
+        '--min-valid-fraction', type=float, help='Drop interferograms with a lower fraction of valid pixels'
+    )
+    parser.add_argument('--max-components', type=int, help='Drop interferograms with more connected components')
+    parser.add_argument(
+        '--mask-coherence',
+        type=float,
+        help='Mask water pixels and pixels with a lower mean coherence over the stack before processing',
+    )
 
     args = parser.parse_args()
 
@@ -52,6 +94,17 @@ def main() -> None:
         min_coherence=args.min_coherence,
         start=args.start_date,
         end=args.end_date,
+        profile=args.mintpy_profile,
+        disk_budget=args.disk_budget,
+        scratch_dir=args.scratch_dir,
+        tiles=(args.tiles[0], args.tiles[1]) if args.tiles else None,
+        tile_overlap=args.tile_overlap,
+        tile_workers=args.tile_workers,
+        min_mean_coherence=args.min_mean_coherence,
+        min_median_coherence=args.min_median_coherence,
+        min_valid_fraction=args.min_valid_fraction,
+        max_components=args.max_components,
+        mask_coherence=args.mask_coherence,
     )
 
     if args.bucket:
@@ -0,0 +1,116 @@
+"""Vectorized extent checks for stacks of HyP3 products."""
+
+from collections.abc import Sequence
+
+import numpy as np
+import shapely
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+
+
+def get_bounds(geometries: Sequence[BaseGeometry] | np.ndarray) -> np.ndarray:
+    """Gets the bounds of every geometry in a single vectorized call.
+
+    Args:
+        geometries: Footprints of the rasters, e.g. the `geometry` column of the product GeoDataFrame.
+
+    Returns:
+        Array of shape (N, 4) with the minx, miny, maxx, maxy of each geometry.
+    """
+    return shapely.bounds(np.asarray(geometries, dtype=object)).reshape(-1, 4)
+
+
+def get_common_extent(bounds: np.ndarray) -> list[float]:
+    """Computes the area covered by all the rasters from their cached bounds.
+
+    Args:
+        bounds: Array of shape (N, 4) as returned by `get_bounds`.
+
+    Returns:
+        List with the common extent coordinates [minx, miny, maxx, maxy]. If the rasters do not overlap,
+        minx >= maxx or miny >= maxy.
+    """
+    if len(bounds) == 0:
+        raise ValueError('Cannot compute the common extent of an empty stack')
+
+    return [
+        float(bounds[:, 0].max()),
+        float(bounds[:, 1].max()),
+        float(bounds[:, 2].min()),
+        float(bounds[:, 3].min()),
+    ]
+
+
+def extent_to_polygon(extent: Sequence[float]) -> BaseGeometry:
+    """Builds a polygon from an extent.
+
+    Args:
+        extent: List with the extent coordinates [minx, miny, maxx, maxy].
+
+    Returns:
+        The extent as a shapely Polygon.
+    """
+    minx, miny, maxx, maxy = extent
+    return shapely.box(minx, miny, maxx, maxy)
+
+
+def find_uncontained(extent: Sequence[float], geometries: Sequence[BaseGeometry] | np.ndarray) -> np.ndarray:
+    """Finds the rasters that do not fully contain an extent.
+
+    Args:
+        extent: List with the extent coordinates [minx, miny, maxx, maxy].
+        geometries: Footprints of the rasters.
+
+    Returns:
+        Sorted indices of the geometries that do not contain the extent.
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    tree = STRtree(geoms)
+    containing = tree.query(extent_to_polygon(extent), predicate='within')
+    return np.setdiff1d(np.arange(len(geoms)), containing)
+
+
+def get_coverage_groups(geometries: Sequence[BaseGeometry] | np.ndarray) -> np.ndarray:
+    """Groups the rasters into sets of overlapping footprints.
+
+    Two rasters belong to the same group if they are linked by a chain of footprints that intersect each other,
+    so rasters from disjoint bursts end up in separate groups.
+
+    Args:
+        geometries: Footprints of the rasters.
+
+    Returns:
+        Array with a group label for every geometry. Labels start at 0 and follow the order of first appearance.
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    if len(geoms) == 0:
+        return np.zeros(0, dtype=int)
+
+    left, right = STRtree(geoms).query(geoms, predicate='intersects')
+    adjacency = coo_matrix((np.ones(len(left), dtype=bool), (left, right)), shape=(len(geoms), len(geoms)))
+    _, components = connected_components(adjacency, directed=False)
+
+    # relabel the components in the order of their first geometry
+    _, first = np.unique(components, return_index=True)
+    order = np.empty(len(first), dtype=int)
+    order[np.argsort(first)] = np.arange(len(first))
+    return order[components]
+
+
+def get_group_extents(bounds: np.ndarray, labels: np.ndarray) -> dict[int, list[float] | None]:
+    """Computes the common extent of each coverage group.
+
+    Args:
+        bounds: Array of shape (N, 4) as returned by `get_bounds`.
+        labels: Group label of each raster as returned by `get_coverage_groups`.
+
+    Returns:
+        Dictionary key: group label, value: common extent of the group or None if the group has no common area.
+    """
+    extents: dict[int, list[float] | None] = {}
+    for label in np.unique(labels):
+        common = get_common_extent(bounds[labels == label])
+        extents[int(label)] = common if common[0] < common[2] and common[1] < common[3] else None
+    return extents
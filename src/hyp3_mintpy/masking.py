@@ -0,0 +1,103 @@
+"""Stack-wide valid pixel mask built from the coherence and water mask rasters."""
+
+import logging
+import os
+
+import numpy as np
+from osgeo import gdal
+
+
+gdal.UseExceptions()
+
+log = logging.getLogger(__name__)
+
+GTIFF_OPTIONS = ['TILED=YES', 'COMPRESS=DEFLATE', 'BIGTIFF=IF_SAFER']
+
+
+def build_stack_mask(
+    corr_paths: list[str | os.PathLike],
+    water_mask_path: str | os.PathLike | None = None,
+    min_coherence: float = 0.01,
+    block_rows: int = 512,
+) -> np.ndarray:
+    """Builds the mask of the pixels worth processing in a stack.
+
+    A pixel is valid if its mean coherence over the interferograms where it has data is at least min_coherence and,
+    if a water mask is given, it is not water. Every raster is read once, in blocks of rows.
+
+    Args:
+        corr_paths: Paths to the coherence rasters, all on the same grid.
+        water_mask_path: Path to a water mask (0 for water) on the same grid.
+        min_coherence: Minimum mean coherence of a valid pixel.
+        block_rows: Number of rows read at once.
+
+    Returns:
+        Boolean array, True for the valid pixels.
+    """
+    first = gdal.Open(str(corr_paths[0]))
+    shape = (first.RasterYSize, first.RasterXSize)
+    first = None
+
+    total = np.zeros(shape, dtype=np.float32)
+    count = np.zeros(shape, dtype=np.int32)
+    for path in corr_paths:
+        ds = gdal.Open(str(path))
+        if (ds.RasterYSize, ds.RasterXSize) != shape:
+            raise ValueError(f'{path} is not on the same grid as {corr_paths[0]}')
+        band = ds.GetRasterBand(1)
+        nodata = band.GetNoDataValue()
+        for row in range(0, shape[0], block_rows):
+            block = band.ReadAsArray(0, row, shape[1], min(block_rows, shape[0] - row)).astype(np.float32)
+            valid = np.isfinite(block) & (block > 0)
+            if nodata is not None:
+                valid &= block != nodata
+            total[row : row + block.shape[0]] += np.where(valid, block, 0)
+            count[row : row + block.shape[0]] += valid
+
+    mask = (count > 0) & (total >= min_coherence * count)
+
+    if water_mask_path is not None:
+        ds = gdal.Open(str(water_mask_path))
+        band = ds.GetRasterBand(1)
+        for row in range(0, shape[0], block_rows):
+            block = band.ReadAsArray(0, row, shape[1], min(block_rows, shape[0] - row))
+            mask[row : row + block.shape[0]] &= block != 0
+
+    log.info(f'Stack mask keeps {100 * mask.mean():.1f}% of the pixels')
+    return mask
+
+
+def write_masked(
+    src_path: str | os.PathLike, dst_path: str | os.PathLike, mask: np.ndarray, block_rows: int = 512
+) -> None:
+    """Writes a copy of a raster as a tiled, compressed GeoTIFF with the pixels outside the mask set to no-data.
+
+    Args:
+        src_path: Path to the source raster, on the same grid as the mask.
+        dst_path: Path for the masked GeoTIFF.
+        mask: Boolean array, True for the valid pixels.
+        block_rows: Number of rows processed at once.
+    """
+    src = gdal.Open(str(src_path))
+    src_band = src.GetRasterBand(1)
+    if (src.RasterYSize, src.RasterXSize) != mask.shape:
+        raise ValueError(f'{src_path} is not on the same grid as the mask')
+    no_data_val = src_band.GetNoDataValue()
+    no_data_val = 0 if no_data_val is None else no_data_val
+
+    dst = gdal.GetDriverByName('GTiff').Create(
+        str(dst_path), src.RasterXSize, src.RasterYSize, 1, src_band.DataType, options=GTIFF_OPTIONS
+    )
+    dst.SetGeoTransform(src.GetGeoTransform())
+    dst.SetProjection(src.GetProjection())
+    dst.SetMetadata(src.GetMetadata())
+    dst_band = dst.GetRasterBand(1)
+    dst_band.SetNoDataValue(no_data_val)
+
+    for row in range(0, src.RasterYSize, block_rows):
+        block = src_band.ReadAsArray(0, row, src.RasterXSize, min(block_rows, src.RasterYSize - row))
+        block[~mask[row : row + block.shape[0]]] = no_data_val
+        dst_band.WriteArray(block, 0, row)
+
+    dst_band.FlushCache()
+    dst = None
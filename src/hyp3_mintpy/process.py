@@ -6,19 +6,19 @@ import os
 import shutil
 import subprocess
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import boto3
 import botocore
 import geopandas as gpd
 import hyp3_sdk as sdk
-import opensarlab_lib as osl
-import shapely.wkt
 from osgeo import gdal
 from tqdm.auto import tqdm
 
 import hyp3_mintpy
-from hyp3_mintpy import util
+from hyp3_mintpy import extent, masking, repack, runner, screening, tiling, util
+from hyp3_mintpy.workspace import Workspace
 
 
 log = logging.getLogger(__name__)
@@ -196,23 +196,49 @@ def check_extent(gdf: gpd.GeoDataFrame, common_extents: list) -> None:
         gdf: Geopandas dataframe with all the tiff files.
         common_extents: List with the common extent coordinates.
     """
-    wkt = (
-        f'POLYGON(({common_extents[0]} {common_extents[1]}, {common_extents[2]} {common_extents[1]}, {common_extents[2]} '
-        f'{common_extents[3]}, {common_extents[0]} {common_extents[3]}, {common_extents[0]} {common_extents[1]}))'
-    )
-
-    wkt_shapely_geom = shapely.wkt.loads(wkt)
-    if not util.check_within_bounds(wkt_shapely_geom, gdf):
-        print('WKT exceeds bounds of at least one dataset')
+    uncontained = extent.find_uncontained(common_extents, gdf['geometry'].to_numpy())
+    if len(uncontained) > 0:
+        names = [Path(p).name for p in gdf['tiff_path'].iloc[uncontained]]
+        print(f'WKT exceeds bounds of {len(names)} dataset(s): {", ".join(names)}')
         raise Exception('Error determining area of common coverage')
 
 
-def set_same_frame(folder: str, wgs84: bool = False) -> None:
+def check_coverage_groups(gdf: gpd.GeoDataFrame) -> None:
+    """Checks the interferograms share a common area, reporting the coverage groups that do not.
+
+    Args:
+        gdf: Geopandas dataframe with the unwrapped phase tiff files.
+    """
+    geometries = gdf['geometry'].to_numpy()
+    groups = extent.get_coverage_groups(geometries)
+    group_extents = extent.get_group_extents(extent.get_bounds(geometries), groups)
+    if len(group_extents) == 1 and group_extents[0] is not None:
+        return
+
+    names = [Path(p).name for p in gdf['tiff_path']]
+    for label, group_extent in group_extents.items():
+        area = 'no common area' if group_extent is None else f'common extent {group_extent}'
+        members = [name for name, group in zip(names, groups) if group == label]
+        print(f'Coverage group {label}: {len(members)} interferograms, {area}: {", ".join(members)}')
+
+    if len(group_extents) > 1:
+        raise Exception(
+            f'Error determining area of common coverage: the interferograms form {len(group_extents)} disjoint '
+            'coverage groups'
+        )
+    raise Exception('Error determining area of common coverage: coverage group 0 has no common area')
+
+
+def set_same_frame(folder: str, wgs84: bool = False, mask_coherence: float | None = None) -> None:
     """Checks the coordinate system for all the files in the folder and reprojects them if necessary.
 
+    Every file is written once, as a tiled and compressed GeoTIFF on the common extent.
+
     Args:
         folder: Path to the folder that has the HyP3 products.
         wgs84: If True reprojects all the files to WGS84 system.
+        mask_coherence: If given, pixels of the interferograms that are water or whose mean coherence over the stack is
+            below this value are written as no-data, so MintPy skips them.
     """
     data_path = Path(folder)
     dem = sorted(list(data_path.glob('*/*dem*.tif')))
@@ -237,43 +263,84 @@ def set_same_frame(folder: str, wgs84: bool = False) -> None:
         gdf = set_same_epsg(gdf)
 
     # check the file extent is within the common extent
-    common_extents = osl.get_common_coverage_extents(unw)
+    geometries = gdf['geometry'].to_numpy()
+    bounds = extent.get_bounds(geometries)
+    is_unw = gdf['tiff_path'].isin(unw).to_numpy()
+    common_extents = extent.get_common_extent(bounds[is_unw])
+
+    check_coverage_groups(gdf.loc[is_unw])
     check_extent(gdf, common_extents)
 
-    # reprojects all files to the common extent
-    for pth in tqdm(gdf['tiff_path']):
-        print(f'Subsetting: {pth}')
-        temp_pth = pth.parent / f'subset_{pth.name}'
+    # virtual subsets to the common extent, reprojected to WGS84 if necessary, so the mask is built on the final grid
+    # and every file is written only once
+    virtual: dict[Path, list[Path]] = {}
+    for pth in gdf['tiff_path']:
+        subset = pth.parent / f'subset_{pth.stem}.vrt'
         gdal.Translate(
-            destName=str(temp_pth),
-            srcDS=str(pth),
+            destName=str(subset),
+            srcDS=str(pth.resolve()),
+            format='VRT',
             projWin=[common_extents[0], common_extents[3], common_extents[2], common_extents[1]],
         )
+        virtual[pth] = [subset]
+        if wgs84:
+            warped = pth.parent / f'wgs84_{pth.stem}.vrt'
+            gdal.Warp(str(warped), str(subset.resolve()), format='VRT', dstSRS='EPSG:4326')
+            virtual[pth].append(warped)
+
+    mask = None
+    if mask_coherence is not None:
+        print(f'Building the stack mask from {len(corr)} coherence files')
+        mask = masking.build_stack_mask(
+            [virtual[pth][-1] for pth in corr], virtual[water_mask[0]][-1] if water_mask else None, mask_coherence
+        )
+    masked = set(unw + corr + conn_comp)
+
+    # writes all files on the common extent, in WGS84 if necessary
+    for pth in tqdm(gdf['tiff_path']):
+        print(f'Subsetting{" and converting to WGS84" if wgs84 else ""}: {pth}')
+        temp_pth = pth.parent / f'subset_{pth.name}'
+        if mask is not None and pth in masked:
+            masking.write_masked(virtual[pth][-1], temp_pth, mask)
+        else:
+            gdal.Translate(destName=str(temp_pth), srcDS=str(virtual[pth][-1]), creationOptions=masking.GTIFF_OPTIONS)
+        for vrt in reversed(virtual[pth]):
+            vrt.unlink()
         pth.unlink()
         temp_pth.rename(pth)
 
-    # reprojects all files to WGS84 if necessary
-    if wgs84:
-        for pth in tqdm(gdf['tiff_path']):
-            print(f'Converting {pth} to WGS84')
-            gdal.Warp(str(pth), str(pth), dstSRS='EPSG:4326')
-
 
-def write_cfg(output_name: str, min_coherence: str) -> None:
+def write_cfg(
+    output_name: str,
+    min_coherence: str,
+    profile: str = 'default',
+    work_dir: str = 'MintPy',
+    subset: list[float] | None = None,
+    reference_date: str | None = None,
+) -> None:
     """Creates a basic config file from a template.
 
     Args:
         output_name: Name of the HyP3 project.
         min_coherence: Minimum coherence for timeseries processing.
+        profile: MintPy processing profile whose options are added to the config file.
+        work_dir: Name of the MintPy working directory inside the project folder.
+        subset: Extent [minx, miny, maxx, maxy] in WGS84 that MintPy loads. If None the whole frame is loaded.
+        reference_date: Reference date (YYYYMMDD) of the timeseries. If None MintPy picks it.
     """
+    options = runner.get_profile_options(profile)
+    if subset is not None:
+        options['mintpy.subset.lalo'] = f'{subset[1]}:{subset[3]},{subset[0]}:{subset[2]}'
+    if reference_date is not None:
+        options['mintpy.reference.date'] = reference_date
     cfg_folder = Path(hyp3_mintpy.__file__).parent / 'schemas'
 
     with Path(f'{cfg_folder}/config.txt').open() as cfg:
         lines = cfg.readlines()
 
     abspath = Path(output_name).resolve()
-    Path(f'{output_name}/MintPy').mkdir(parents=True)
-    with Path(f'{output_name}/MintPy/{output_name}.txt').open('w') as cfg:
+    Path(f'{output_name}/{work_dir}').mkdir(parents=True, exist_ok=True)
+    with Path(f'{output_name}/{work_dir}/{output_name}.txt').open('w') as cfg:
         for line in lines:
             newstring = ''
             if 'folder' in line:
@@ -283,31 +350,123 @@ def write_cfg(output_name: str, min_coherence: str) -> None:
             else:
                 newstring = line
             cfg.write(newstring)
+        cfg.writelines(f'{key} = {value}\n' for key, value in options.items())
 
 
-def run_mintpy(output_name: str) -> Path:
-    """Calls mintpy and prepares a zip file with the outputs.
+def run_mintpy(
+    output_name: str, profile: str = 'default', steps: list[str] | None = None, workspace: Workspace | None = None
+) -> Path:
+    """Calls mintpy step by step and prepares a zip file with the compressed outputs.
 
     Args:
         output_name: Name of the HyP3 project.
+        profile: MintPy processing profile.
+        steps: Subset of MintPy steps to run. If None all the steps of the profile are run.
+        workspace: Workspace that deletes the input files once the MintPy steps reading them have finished and
+            enforces the disk budget between steps.
 
     Returns:
         Path for the output zip file.
     """
-    subprocess.call(
-        f'smallbaselineApp.py {output_name}/MintPy/{output_name}.txt --work-dir {output_name}/MintPy', shell=True
+    runner.run_steps(
+        f'{output_name}/MintPy/{output_name}.txt',
+        f'{output_name}/MintPy',
+        profile,
+        steps,
+        on_step_done=workspace.step_done if workspace is not None else None,
     )
     subprocess.call(f'mv {output_name}/MintPy/*.h5 {output_name}/', shell=True)
     subprocess.call(f'mv {output_name}/MintPy/inputs/geometry*.h5 {output_name}/', shell=True)
     subprocess.call(f'mv {output_name}/MintPy/*.txt {output_name}/', shell=True)
-    subprocess.call(f'rm -rf {output_name}/MintPy {output_name}/S1_* {output_name}/shape_*', shell=True)
+
+    return package_mintpy(output_name)
+
+
+def run_tiled_mintpy(
+    output_name: str,
+    work_dirs: list[str],
+    profile: str = 'default',
+    workers: int | None = None,
+    workspace: Workspace | None = None,
+) -> Path:
+    """Calls mintpy concurrently on every tile, stitches the outputs and prepares a zip file with them.
+
+    Args:
+        output_name: Name of the HyP3 project.
+        work_dirs: MintPy working directory of every tile with a config written by write_cfg, row by row from the north
+            west corner.
+        profile: MintPy processing profile.
+        workers: Number of tiles processed at the same time. If None all the tiles run at once.
+        workspace: Workspace that deletes the input files once every tile has loaded them and enforces the disk
+            budget between steps.
+
+    Returns:
+        Path for the output zip file.
+    """
+
+    def run_tile(work_dir: str) -> None:
+        def on_step_done(step: str) -> None:
+            if workspace is None:
+                return
+            if step == 'load_data':
+                workspace.release(work_dir)
+            workspace.check_budget()
+
+        runner.run_steps(
+            f'{output_name}/{work_dir}/{output_name}.txt',
+            f'{output_name}/{work_dir}',
+            profile,
+            on_step_done=on_step_done,
+        )
+
+    with ThreadPoolExecutor(max_workers=workers or len(work_dirs)) as executor:
+        list(executor.map(run_tile, work_dirs))
+
+    tiling.stitch_tiles([Path(output_name) / work_dir for work_dir in work_dirs], output_name)
+
+    # the packaged config describes the stitched frame, so it leaves out the subset of the first tile
+    config = Path(output_name) / work_dirs[0] / f'{output_name}.txt'
+    with config.open() as cfg:
+        lines = [line for line in cfg if not line.startswith('mintpy.subset.lalo')]
+    with (Path(output_name) / config.name).open('w') as cfg:
+        cfg.writelines(lines)
+
+    return package_mintpy(output_name)
+
+
+def package_mintpy(output_name: str) -> Path:
+    """Removes the intermediate files, compresses the outputs and zips them.
+
+    Args:
+        output_name: Name of the HyP3 project.
+
+    Returns:
+        Path for the output zip file.
+    """
+    subprocess.call(f'rm -rf {output_name}/MintPy* {output_name}/S1_* {output_name}/shape_*', shell=True)
+    repack.repack_files(sorted(Path(output_name).glob('*.h5')))
     output_zip = shutil.make_archive(base_name=output_name, format='zip', base_dir=output_name)
 
     return Path(output_zip)
 
 
 def process_mintpy(
-    job_name: str | None, prefix: str | None, min_coherence: float, start: str | None = None, end: str | None = None
+    job_name: str | None,
+    prefix: str | None,
+    min_coherence: float,
+    start: str | None = None,
+    end: str | None = None,
+    profile: str = 'default',
+    disk_budget: float | None = None,
+    scratch_dir: str | None = None,
+    tiles: tuple[int, int] | None = None,
+    tile_overlap: float = 0.1,
+    tile_workers: int | None = None,
+    min_mean_coherence: float | None = None,
+    min_median_coherence: float | None = None,
+    min_valid_fraction: float | None = None,
+    max_components: int | None = None,
+    mask_coherence: float | None = None,
 ) -> Path:
     """Create a greeting product.
 
@@ -317,6 +476,17 @@ def process_mintpy(
         min_coherence: Minimum coherence for timeseries processing.
         start: Start date for the timeseries
         end: End date for the timeseries
+        profile: MintPy processing profile, 'fast' turns off optional corrections and plotting
+        disk_budget: Maximum scratch disk usage in GB
+        scratch_dir: Fast scratch location for the MintPy working directory
+        tiles: Number of tile rows and columns to split the frame into. If None the frame is processed at once
+        tile_overlap: Overlap between neighbouring tiles as a fraction of the tile size
+        tile_workers: Number of tiles processed at the same time. If None all the tiles run at once
+        min_mean_coherence: Drop interferograms with a lower mean coherence before framing
+        min_median_coherence: Drop interferograms with a lower median coherence before framing
+        min_valid_fraction: Drop interferograms with a lower fraction of valid pixels before framing
+        max_components: Drop interferograms with more connected components before framing
+        mask_coherence: Write water pixels and pixels with a lower mean coherence over the stack as no-data
 
     Returns:
         Path for the output zip file.
@@ -326,13 +496,56 @@ def process_mintpy(
     elif job_name is not None and prefix is not None:
         warnings.warn('Both job name and prefix were given. You should give just one. Using job name...')
 
-    if job_name is not None:
-        output_name = download_job_pairs(job_name, start, end)
-    else:
-        output_name = download_bucket_pairs(prefix, start, end)
-    set_same_frame(output_name, wgs84=True)
+    output_name = job_name if job_name is not None else str(prefix).split('/')[-1]
+    workspace = Workspace(output_name, budget_gb=disk_budget, scratch_dir=scratch_dir)
 
-    write_cfg(output_name, str(min_coherence))
+    try:
+        with workspace.stage('download'):
+            if job_name is not None:
+                download_job_pairs(job_name, start, end)
+            else:
+                download_bucket_pairs(prefix, start, end)
+
+        thresholds = (min_mean_coherence, min_median_coherence, min_valid_fraction, max_components)
+        if any(threshold is not None for threshold in thresholds):
+            with workspace.stage('screen'):
+                screening.screen_pairs(output_name, *thresholds)
+
+        with workspace.stage('frame'):
+            set_same_frame(output_name, wgs84=True, mask_coherence=mask_coherence)
+
+        if tiles is None:
+            # the product folders are only read by MintPy when loading the data
+            workspace.register(Path(output_name).glob('S1_*/*'), ['load_data'])
+            workspace.hot_dir('MintPy')
+            write_cfg(output_name, str(min_coherence), profile)
+
+            with workspace.stage('mintpy'):
+                product_file = run_mintpy(output_name, profile, workspace=workspace)
+        else:
+            unw = sorted(Path(output_name).glob('*/*_unw_phase*.tif'))
+            frame = list(util.get_geotiff_bbox(unw[0]).bounds)
+            tile_extents = tiling.get_tiles(frame, tiles[0], tiles[1], tile_overlap)
+            # every tile is referenced to the same date, so the stitched timeseries shares one reference date
+            reference_date = min(p.name.split('_')[3] for p in unw)
+
+            work_dirs = [f'MintPy_tile{index}' for index in range(len(tile_extents))]
+            workspace.register(Path(output_name).glob('S1_*/*'), work_dirs)
+            for work_dir, tile_extent in zip(work_dirs, tile_extents):
+                workspace.hot_dir(work_dir)
+                write_cfg(
+                    output_name,
+                    str(min_coherence),
+                    profile,
+                    work_dir=work_dir,
+                    subset=tile_extent,
+                    reference_date=reference_date,
+                )
+
+            with workspace.stage('mintpy'):
+                product_file = run_tiled_mintpy(output_name, work_dirs, profile, tile_workers, workspace)
+    finally:
+        workspace.cleanup()
+        workspace.log_stages()
 
-    product_file = run_mintpy(output_name)
     return product_file
@@ -0,0 +1,178 @@
+"""Repacking of the MintPy HDF5 outputs with chunking and compression."""
+
+import functools
+import logging
+import os
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+
+log = logging.getLogger(__name__)
+
+# gzip is available in every HDF5 build, so the products stay readable without extra filter plugins
+COMPRESSION: dict[str, dict] = {
+    'gzip': {'compression': 'gzip', 'compression_opts': 4, 'shuffle': True},
+    'lzf': {'compression': 'lzf', 'shuffle': True},
+}
+
+# datasets with fewer elements than this (dates, baselines, flags...) are copied unchanged
+MIN_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class RepackResult:
+    """Size of an HDF5 file before and after repacking."""
+
+    path: Path
+    size_before: int
+    size_after: int
+
+
+def get_chunks(shape: tuple[int, ...]) -> tuple[int, ...]:
+    """Gets a chunk shape that balances per-date and per-pixel reads.
+
+    Stacks (date, row, column) are chunked in blocks of up to 16 dates and 128 x 128 pixels, so reading one date or
+    the time series of one pixel only touches a small fraction of the file. 2D datasets use 256 x 256 pixel tiles.
+
+    Args:
+        shape: Shape of the dataset.
+
+    Returns:
+        Chunk shape.
+    """
+    if len(shape) == 3:
+        return min(shape[0], 16), min(shape[1], 128), min(shape[2], 128)
+    return min(shape[0], 256), *[min(size, 256) for size in shape[1:]]
+
+
+def _copy_dataset(src: h5py.Dataset, dst_group: h5py.Group, name: str, compression: str) -> None:
+    if src.ndim < 2 or src.size < MIN_SIZE or src.dtype.kind not in 'biuf':
+        src.parent.copy(src, dst_group, name=name)
+        return
+
+    chunks = get_chunks(src.shape)
+    dst = dst_group.create_dataset(
+        name, shape=src.shape, dtype=src.dtype, chunks=chunks, fillvalue=src.fillvalue, **COMPRESSION[compression]
+    )
+    for start in range(0, src.shape[0], chunks[0]):
+        dst[start : start + chunks[0]] = src[start : start + chunks[0]]
+    dst.attrs.update(src.attrs)
+
+
+def _attrs_equal(first: h5py.AttributeManager, second: h5py.AttributeManager) -> bool:
+    if set(first.keys()) != set(second.keys()):
+        return False
+    return all(np.array_equal(np.asarray(first[key]), np.asarray(second[key])) for key in first)
+
+
+def check_round_trip(original: str | os.PathLike, repacked: str | os.PathLike) -> bool:
+    """Checks that two HDF5 files hold the same groups, datasets, values and attributes.
+
+    Args:
+        original: Path to the original file.
+        repacked: Path to the repacked file.
+
+    Returns:
+        True if the contents are the same, else False.
+    """
+    with h5py.File(original, 'r') as fa, h5py.File(repacked, 'r') as fb:
+        names: list[str] = []
+        fa.visit(names.append)
+        other: list[str] = []
+        fb.visit(other.append)
+        if names != other or not _attrs_equal(fa.attrs, fb.attrs):
+            return False
+
+        for name in names:
+            a, b = fa[name], fb[name]
+            if type(a) is not type(b) or not _attrs_equal(a.attrs, b.attrs):
+                return False
+            if not isinstance(a, h5py.Dataset):
+                continue
+            if a.shape != b.shape or a.dtype != b.dtype:
+                return False
+            if a.ndim == 0 or a.size < MIN_SIZE or a.dtype.kind not in 'biuf':
+                if not np.array_equal(a[()], b[()]):
+                    return False
+                continue
+            step = get_chunks(a.shape)[0]
+            for start in range(0, a.shape[0], step):
+                block_a, block_b = a[start : start + step], b[start : start + step]
+                if not np.array_equal(block_a, block_b, equal_nan=a.dtype.kind == 'f'):
+                    return False
+    return True
+
+
+def repack_file(path: str | os.PathLike, compression: str = 'gzip') -> RepackResult:
+    """Rewrites an HDF5 file with chunked and compressed datasets.
+
+    The original file is only replaced if the repacked file has the same contents and is smaller.
+
+    Args:
+        path: Path to the HDF5 file.
+        compression: Compression filter, gzip or lzf.
+
+    Returns:
+        Size of the file before and after repacking.
+    """
+    if compression not in COMPRESSION:
+        raise ValueError(f'Unknown compression {compression}, should be one of {", ".join(COMPRESSION)}')
+
+    path = Path(path)
+    temp = path.parent / f'repack_{path.name}'
+    with h5py.File(path, 'r') as fin, h5py.File(temp, 'w') as fout:
+        fout.attrs.update(fin.attrs)
+
+        def copy(name: str, obj: h5py.Group | h5py.Dataset) -> None:
+            if isinstance(obj, h5py.Group):
+                fout.require_group(name).attrs.update(obj.attrs)
+            else:
+                parent = fout.require_group(posixpath.dirname(name) or '/')
+                _copy_dataset(obj, parent, posixpath.basename(name), compression)
+
+        fin.visititems(copy)
+
+    if not check_round_trip(path, temp):
+        temp.unlink()
+        raise ValueError(f'Repacked {path} does not match the original file')
+
+    size_before = path.stat().st_size
+    size_after = temp.stat().st_size
+    if size_after >= size_before:
+        temp.unlink()
+        return RepackResult(path=path, size_before=size_before, size_after=size_before)
+
+    temp.replace(path)
+    return RepackResult(path=path, size_before=size_before, size_after=size_after)
+
+
+def repack_files(paths: list[Path], compression: str = 'gzip', workers: int | None = None) -> list[RepackResult]:
+    """Repacks several HDF5 files in parallel.
+
+    Args:
+        paths: Paths to the HDF5 files.
+        compression: Compression filter, gzip or lzf.
+        workers: Number of processes. If None it uses the number of CPUs.
+
+    Returns:
+        Size of every file before and after repacking.
+    """
+    if not paths:
+        return []
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(paths))) as executor:
+        results = list(executor.map(functools.partial(repack_file, compression=compression), paths))
+
+    for result in results:
+        log.info(
+            f'Repacked {result.path.name}: {result.size_before / 1024**2:.1f} MB -> {result.size_after / 1024**2:.1f} MB'
+        )
+    before = sum(result.size_before for result in results)
+    after = sum(result.size_after for result in results)
+    log.info(f'Repacked {len(results)} HDF5 file(s), {100 * (1 - after / before):.1f}% smaller')
+    return results
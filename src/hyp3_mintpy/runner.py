@@ -0,0 +1,174 @@
+"""Step by step execution of smallbaselineApp.py."""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+log = logging.getLogger(__name__)
+
+STEPS = (
+    'load_data',
+    'modify_network',
+    'reference_point',
+    'quick_overview',
+    'correct_unwrap_error',
+    'invert_network',
+    'correct_LOD',
+    'correct_SET',
+    'correct_ionosphere',
+    'correct_troposphere',
+    'deramp',
+    'correct_topography',
+    'residual_RMS',
+    'reference_date',
+    'velocity',
+    'geocode',
+    'google_earth',
+    'hdfeos5',
+    'plot',
+)
+
+# skip: steps that are not run at all
+# options: MintPy template options appended to the config file by write_cfg
+PROFILES: dict[str, dict] = {
+    'default': {
+        'skip': (),
+        'options': {},
+    },
+    'fast': {
+        'skip': ('quick_overview', 'google_earth', 'hdfeos5', 'plot'),
+        'options': {
+            'mintpy.unwrapError.method': 'no',
+            'mintpy.solidEarthTides': 'no',
+            'mintpy.ionosphericDelay.method': 'no',
+            'mintpy.deramp': 'no',
+            'mintpy.topographicResidual': 'no',
+            'mintpy.save.kmz': 'no',
+            'mintpy.save.hdfEos5': 'no',
+            'mintpy.plot': 'no',
+        },
+    },
+}
+
+
+@dataclass(frozen=True)
+class StepResult:
+    """Wall time and peak memory of a MintPy step."""
+
+    step: str
+    seconds: float
+    max_rss_mb: float
+
+
+def get_profile_options(profile: str) -> dict[str, str]:
+    """Gets the MintPy template options for a processing profile.
+
+    Args:
+        profile: Name of the processing profile.
+
+    Returns:
+        Dictionary key: MintPy option, value: option value.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown MintPy profile {profile}, should be one of {", ".join(PROFILES)}')
+    return dict(PROFILES[profile]['options'])
+
+
+def get_steps(profile: str = 'default', steps: list[str] | None = None) -> list[str]:
+    """Gets the MintPy steps to run in order.
+
+    Args:
+        profile: Name of the processing profile.
+        steps: Subset of steps to run, e.g. to re-run a single step. If None all the steps of the profile are run.
+
+    Returns:
+        List with the steps to run.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown MintPy profile {profile}, should be one of {", ".join(PROFILES)}')
+
+    if steps is not None:
+        unknown = [step for step in steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f'Unknown MintPy step(s): {", ".join(unknown)}')
+        return [step for step in STEPS if step in steps]
+
+    return [step for step in STEPS if step not in PROFILES[profile]['skip']]
+
+
+def run_step(config: str | os.PathLike, work_dir: str | os.PathLike, step: str) -> StepResult:
+    """Runs a single smallbaselineApp.py step in a subprocess.
+
+    Args:
+        config: Path to the MintPy config file.
+        work_dir: MintPy working directory.
+        step: Name of the step.
+
+    Returns:
+        Wall time and peak memory of the step.
+    """
+    args = ['smallbaselineApp.py', str(config), '--work-dir', str(work_dir)]
+    args += ['--plot'] if step == 'plot' else ['--dostep', step]
+
+    log.info(f'Running MintPy step {step}')
+    start = time.perf_counter()
+    proc = subprocess.Popen(args)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, args)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss_mb = usage.ru_maxrss / (1024**2 if sys.platform == 'darwin' else 1024)
+    return StepResult(step=step, seconds=seconds, max_rss_mb=max_rss_mb)
+
+
+def run_steps(
+    config: str | os.PathLike,
+    work_dir: str | os.PathLike,
+    profile: str = 'default',
+    steps: list[str] | None = None,
+    on_step_done: Callable[[str], object] | None = None,
+) -> list[StepResult]:
+    """Runs the MintPy steps one by one, stopping at the first one that fails.
+
+    The timing of the steps that finished is logged even if a later step fails.
+
+    Args:
+        config: Path to the MintPy config file.
+        work_dir: MintPy working directory.
+        profile: Name of the processing profile.
+        steps: Subset of steps to run. If None all the steps of the profile are run.
+        on_step_done: Function called with the name of each step after it finishes successfully.
+
+    Returns:
+        List with the wall time and peak memory of every step.
+    """
+    results: list[StepResult] = []
+    try:
+        for step in get_steps(profile, steps):
+            results.append(run_step(config, work_dir, step))
+            if on_step_done is not None:
+                on_step_done(step)
+    finally:
+        log_step_results(results)
+    return results
+
+
+def log_step_results(results: list[StepResult]) -> None:
+    """Logs a summary of the MintPy steps timing.
+
+    Args:
+        results: Results of the MintPy steps.
+    """
+    total = sum(result.seconds for result in results)
+    for result in results:
+        log.info(f'{result.step:<22}{result.seconds:>10.1f} s{result.max_rss_mb:>10.0f} MB')
+    log.info(f'{"total":<22}{total:>10.1f} s')
@@ -0,0 +1,160 @@
+"""Interferogram quality screening from decimated raster statistics."""
+
+import logging
+import math
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from osgeo import gdal
+
+
+gdal.UseExceptions()
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PairStats:
+    """Quality statistics of an interferogram."""
+
+    folder: Path
+    mean_coherence: float
+    median_coherence: float
+    valid_fraction: float
+    n_components: int
+
+
+def read_decimated(path: str | os.PathLike, max_size: int = 512, nodata: float | None = None) -> np.ndarray:
+    """Reads a decimated version of the first band of a raster.
+
+    GDAL serves the read from the overviews when the raster has them, otherwise it samples every n-th pixel.
+
+    Args:
+        path: Path to the raster.
+        max_size: Maximum number of rows and columns of the decimated array.
+        nodata: No-data value used when the raster does not define one.
+
+    Returns:
+        Decimated array as float64 with NaN for no-data pixels.
+    """
+    ds = gdal.Open(str(path))
+    band = ds.GetRasterBand(1)
+    factor = max(1, math.ceil(max(ds.RasterXSize, ds.RasterYSize) / max_size))
+    data = band.ReadAsArray(
+        buf_xsize=max(1, ds.RasterXSize // factor),
+        buf_ysize=max(1, ds.RasterYSize // factor),
+        resample_alg=gdal.GRIORA_NearestNeighbour,
+    ).astype(np.float64)
+
+    no_data_val = band.GetNoDataValue()
+    no_data_val = nodata if no_data_val is None else no_data_val
+    if no_data_val is not None and not np.isnan(no_data_val):
+        data[data == no_data_val] = np.nan
+    return data
+
+
+def get_pair_stats(folder: str | os.PathLike, max_size: int = 512) -> PairStats:
+    """Computes the quality statistics of the interferogram in a product folder.
+
+    Args:
+        folder: Path to the product folder with the corr, unw_phase and conncomp GeoTIFFs.
+        max_size: Maximum number of rows and columns of the decimated reads.
+
+    Returns:
+        Quality statistics of the interferogram.
+    """
+    folder = Path(folder)
+    corr = read_decimated(next(folder.glob('*_corr*.tif')), max_size, nodata=0)
+    unw = read_decimated(next(folder.glob('*_unw_phase*.tif')), max_size, nodata=0)
+    conncomp = read_decimated(next(folder.glob('*_conncomp*.tif')), max_size)
+
+    valid = ~np.isnan(unw) & ~np.isnan(corr)
+    valid_corr = corr[valid]
+    components = conncomp[valid]
+    components = components[~np.isnan(components) & (components > 0)]
+
+    return PairStats(
+        folder=folder,
+        mean_coherence=float(valid_corr.mean()) if valid_corr.size else 0.0,
+        median_coherence=float(np.median(valid_corr)) if valid_corr.size else 0.0,
+        valid_fraction=float(valid.mean()),
+        n_components=len(np.unique(components)),
+    )
+
+
+def passes(
+    stats: PairStats,
+    min_mean_coherence: float | None = None,
+    min_median_coherence: float | None = None,
+    min_valid_fraction: float | None = None,
+    max_components: int | None = None,
+) -> bool:
+    """Checks if an interferogram passes the quality thresholds.
+
+    Args:
+        stats: Quality statistics of the interferogram.
+        min_mean_coherence: Minimum mean coherence of the valid pixels.
+        min_median_coherence: Minimum median coherence of the valid pixels.
+        min_valid_fraction: Minimum fraction of valid pixels.
+        max_components: Maximum number of connected components.
+
+    Returns:
+        True if the interferogram passes all the given thresholds, else False.
+    """
+    return (
+        (min_mean_coherence is None or stats.mean_coherence >= min_mean_coherence)
+        and (min_median_coherence is None or stats.median_coherence >= min_median_coherence)
+        and (min_valid_fraction is None or stats.valid_fraction >= min_valid_fraction)
+        and (max_components is None or stats.n_components <= max_components)
+    )
+
+
+def screen_pairs(
+    folder: str | os.PathLike,
+    min_mean_coherence: float | None = None,
+    min_median_coherence: float | None = None,
+    min_valid_fraction: float | None = None,
+    max_components: int | None = None,
+    max_size: int = 512,
+    workers: int | None = None,
+) -> list[PairStats]:
+    """Deletes the product folders of the interferograms that do not pass the quality thresholds.
+
+    Args:
+        folder: Path to the folder that has the HyP3 products.
+        min_mean_coherence: Minimum mean coherence of the valid pixels.
+        min_median_coherence: Minimum median coherence of the valid pixels.
+        min_valid_fraction: Minimum fraction of valid pixels.
+        max_components: Maximum number of connected components.
+        max_size: Maximum number of rows and columns of the decimated reads.
+        workers: Number of threads reading the rasters. If None it uses the ThreadPoolExecutor default.
+
+    Returns:
+        Quality statistics of the interferograms that were kept.
+    """
+    products = sorted(p.parent for p in Path(folder).glob('*/*_unw_phase*.tif'))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats = list(executor.map(lambda product: get_pair_stats(product, max_size), products))
+
+    kept, dropped = [], []
+    for pair in stats:
+        if passes(pair, min_mean_coherence, min_median_coherence, min_valid_fraction, max_components):
+            kept.append(pair)
+        else:
+            dropped.append(pair)
+    if stats and not kept:
+        raise ValueError('No interferogram passed the quality screening')
+
+    for pair in dropped:
+        log.info(
+            f'Dropping {pair.folder.name}: mean coherence {pair.mean_coherence:.2f}, median coherence '
+            f'{pair.median_coherence:.2f}, valid fraction {pair.valid_fraction:.2f}, {pair.n_components} components'
+        )
+        shutil.rmtree(pair.folder)
+
+    log.info(f'Kept {len(kept)} of {len(stats)} interferograms after quality screening')
+    return kept
@@ -0,0 +1,186 @@
+"""Spatial tiling of MintPy runs and stitching of the tiled outputs."""
+
+import logging
+import os
+from contextlib import ExitStack
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+
+log = logging.getLogger(__name__)
+
+# datasets whose tiles are shifted to agree in the overlaps, as each tile is referenced to its own point
+ALIGNED_DATASETS = ('timeseries', 'velocity')
+
+
+def get_tiles(extent: list[float], n_rows: int, n_cols: int, overlap: float = 0.1) -> list[list[float]]:
+    """Splits an extent into overlapping tiles.
+
+    Args:
+        extent: List with the extent coordinates [minx, miny, maxx, maxy].
+        n_rows: Number of tile rows.
+        n_cols: Number of tile columns.
+        overlap: Width of the strip shared by neighbouring tiles as a fraction of the tile size.
+
+    Returns:
+        List with the tile extents [minx, miny, maxx, maxy], row by row from the north west corner.
+    """
+    if n_rows < 1 or n_cols < 1:
+        raise ValueError('The number of tile rows and columns should be at least 1')
+    if not 0 <= overlap < 1:
+        raise ValueError('The tile overlap should be between 0 and 1')
+
+    minx, miny, maxx, maxy = extent
+    width = (maxx - minx) / n_cols
+    height = (maxy - miny) / n_rows
+    # each side is widened by half the overlap, so neighbouring tiles share a strip of overlap times the tile size
+    margin = overlap / 2
+    tiles = []
+    for row in range(n_rows):
+        for col in range(n_cols):
+            tiles.append(
+                [
+                    max(minx, minx + (col - margin) * width),
+                    max(miny, maxy - (row + 1 + margin) * height),
+                    min(maxx, minx + (col + 1 + margin) * width),
+                    min(maxy, maxy - (row - margin) * height),
+                ]
+            )
+    return tiles
+
+
+def get_mosaic_grid(metas: list[dict]) -> tuple[list[tuple[int, int]], tuple[int, int], dict]:
+    """Gets the grid that covers all the tiles.
+
+    Args:
+        metas: MintPy metadata of every tile.
+
+    Returns:
+        Row and column of the upper left pixel of each tile in the mosaic, mosaic shape and mosaic grid metadata.
+    """
+    x_step = float(metas[0]['X_STEP'])
+    y_step = float(metas[0]['Y_STEP'])
+    x_first = min(float(meta['X_FIRST']) for meta in metas)
+    y_first = max(float(meta['Y_FIRST']) for meta in metas)
+
+    offsets = [
+        (round((float(meta['Y_FIRST']) - y_first) / y_step), round((float(meta['X_FIRST']) - x_first) / x_step))
+        for meta in metas
+    ]
+    length = max(row + int(meta['LENGTH']) for (row, _), meta in zip(offsets, metas))
+    width = max(col + int(meta['WIDTH']) for (_, col), meta in zip(offsets, metas))
+    grid = {'LENGTH': str(length), 'WIDTH': str(width), 'X_FIRST': str(x_first), 'Y_FIRST': str(y_first)}
+    return offsets, (length, width), grid
+
+
+def mosaic_arrays(
+    arrays: list[np.ndarray], offsets: list[tuple[int, int]], shape: tuple[int, int], align: bool = False
+) -> np.ndarray:
+    """Places 2D tiles in a mosaic, the first tile covering a pixel wins.
+
+    Args:
+        arrays: 2D array of every tile.
+        offsets: Row and column of the upper left pixel of each tile in the mosaic.
+        shape: Shape of the mosaic.
+        align: If True each tile is shifted by the median difference with the mosaic where they overlap.
+
+    Returns:
+        The mosaic, NaN (or 0 for non float data) where no tile has data.
+    """
+    is_float = arrays[0].dtype.kind == 'f'
+    mosaic = np.full(shape, np.nan if is_float else 0, dtype=arrays[0].dtype)
+    filled = np.zeros(shape, dtype=bool)
+
+    for data, (row, col) in zip(arrays, offsets):
+        window = (slice(row, row + data.shape[0]), slice(col, col + data.shape[1]))
+        current = mosaic[window]
+        overlap = filled[window]
+
+        if align and overlap.any():
+            offset = np.nanmedian(current[overlap] - data[overlap])
+            data = data + (0 if np.isnan(offset) else offset)
+
+        update = ~overlap
+        if is_float:
+            update |= np.isnan(current) & ~np.isnan(data)
+        mosaic[window] = np.where(update, data, current)
+        filled[window] = True
+
+    return mosaic
+
+
+def stitch_file(tile_files: list[Path], output: str | os.PathLike) -> None:
+    """Stitches the same MintPy HDF5 file from every tile into a single file.
+
+    The timeseries and velocity of every tile are shifted to agree with the tiles before it in the overlaps, and the
+    result is referenced to the reference point of the first tile. All the tiles should share the same reference date.
+
+    Args:
+        tile_files: Path to the file in every tile, row by row from the north west corner.
+        output: Path for the stitched file.
+    """
+    with ExitStack() as stack:
+        files = [stack.enter_context(h5py.File(f, 'r')) for f in tile_files]
+        metas = [dict(f.attrs) for f in files]
+        if len({meta.get('REF_DATE') for meta in metas}) > 1:
+            raise ValueError(f'Tiles of {Path(tile_files[0]).name} are referenced to different dates')
+        offsets, shape, grid = get_mosaic_grid(metas)
+
+        attrs = {key: value for key, value in metas[0].items() if not key.startswith('SUBSET_')}
+        attrs.update(grid)
+        ref = None
+        if 'REF_Y' in metas[0] and 'REF_X' in metas[0]:
+            ref = (offsets[0][0] + int(metas[0]['REF_Y']), offsets[0][1] + int(metas[0]['REF_X']))
+            attrs.update({'REF_Y': str(ref[0]), 'REF_X': str(ref[1])})
+
+        tile_shapes = [(int(meta['LENGTH']), int(meta['WIDTH'])) for meta in metas]
+        with h5py.File(output, 'w') as fout:
+            fout.attrs.update(attrs)
+            for name, ds in files[0].items():
+                if not isinstance(ds, h5py.Dataset):
+                    continue
+
+                if ds.ndim < 2 or ds.shape[-2:] != tile_shapes[0]:
+                    values = ds[()]
+                    if any(not np.array_equal(f[name][()], values) for f in files[1:]):
+                        raise ValueError(f'Dataset {name} of {Path(tile_files[0]).name} differs between tiles')
+                    fout.create_dataset(name, data=values)
+                    fout[name].attrs.update(ds.attrs)
+                    continue
+
+                align = name in ALIGNED_DATASETS
+                out = fout.create_dataset(name, shape=ds.shape[:-2] + shape, dtype=ds.dtype)
+                out.attrs.update(ds.attrs)
+                for index in np.ndindex(ds.shape[:-2]):
+                    mosaic = mosaic_arrays([f[name][index] for f in files], offsets, shape, align)
+                    if align and ref is not None and not np.isnan(mosaic[ref]):
+                        mosaic -= mosaic[ref]
+                    out[index] = mosaic
+
+
+def stitch_tiles(tile_dirs: list[Path], output_dir: str | os.PathLike) -> list[Path]:
+    """Stitches the MintPy outputs and geometry files of every tile.
+
+    Args:
+        tile_dirs: MintPy working directory of every tile, row by row from the north west corner.
+        output_dir: Folder for the stitched files.
+
+    Returns:
+        List with the paths of the stitched files.
+    """
+    relative = [p.relative_to(tile_dirs[0]) for p in sorted(tile_dirs[0].glob('*.h5'))]
+    relative += [p.relative_to(tile_dirs[0]) for p in sorted(tile_dirs[0].glob('inputs/geometry*.h5'))]
+
+    stitched = []
+    for name in relative:
+        tile_files = [tile_dir / name for tile_dir in tile_dirs]
+        if not all(f.exists() for f in tile_files):
+            log.warning(f'Skipping {name}, it is missing from at least one tile')
+            continue
+        output = Path(output_dir) / name.name
+        log.info(f'Stitching {len(tile_files)} tiles of {name}')
+        stitch_file(tile_files, output)
+        stitched.append(output)
+    return stitched
@@ -9,6 +9,7 @@ from pathlib import Path
 import geopandas as gpd
 import numpy as np
 import rasterio
+import shapely
 import shapely.wkt
 from mintpy.utils import readfile
 from osgeo import gdal, ogr, osr
@@ -251,7 +252,7 @@ def check_within_bounds(wkt_shapely_geom: BaseGeometry, gdf: gpd.GeoDataFrame) -
 
     returns: True if wkt_shapely_geom is contained within all geometries in the GeoDataFrame, else False
     """
-    return all(wkt_shapely_geom.within(geom) for geom in gdf['geometry'])
+    return bool(shapely.within(wkt_shapely_geom, gdf['geometry'].to_numpy()).all())
 
 
 def save_shapefile(
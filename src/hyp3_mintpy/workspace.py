@@ -0,0 +1,200 @@
+"""Scratch disk management for the processing workspace."""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+log = logging.getLogger(__name__)
+
+
+def get_disk_usage(path: str | Path) -> int:
+    """Gets the disk space allocated to all the files under a directory.
+
+    Symbolic links are not followed.
+
+    Args:
+        path: Path to the directory.
+
+    Returns:
+        Allocated size in bytes, 0 if the directory does not exist.
+    """
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                stat = os.lstat(Path(dirpath) / name)
+            except FileNotFoundError:
+                continue
+            total += stat.st_blocks * 512
+    return total
+
+
+class Workspace:
+    """Tracks the scratch disk usage of a job and deletes files once their last consumer has finished."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        budget_gb: float | None = None,
+        scratch_dir: str | os.PathLike | None = None,
+        interval: float = 5.0,
+    ) -> None:
+        """Creates a workspace.
+
+        Args:
+            root: Folder that holds the products of the job.
+            budget_gb: Maximum scratch disk usage in GB. If None the usage is only recorded.
+            scratch_dir: Fast scratch location (e.g. tmpfs or local NVMe) for hot intermediates. If None they stay in
+                root.
+            interval: Seconds between disk usage samples while a stage is running.
+        """
+        self.root = Path(root)
+        self.budget = None if budget_gb is None else int(budget_gb * 1024**3)
+        self.scratch_dir = None if scratch_dir is None else Path(scratch_dir)
+        self.interval = interval
+        self.consumers: dict[Path, set[str]] = {}
+        self.hot_dirs: list[Path] = []
+        self.peaks: dict[str, int] = {}
+        self.durations: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def usage(self) -> int:
+        """Gets the current disk usage of the workspace, including the hot intermediates, in bytes."""
+        return sum(get_disk_usage(d) for d in [self.root, *self.hot_dirs])
+
+    def check_budget(self, usage: int | None = None) -> None:
+        """Raises an error if the disk usage exceeds the budget.
+
+        Args:
+            usage: Disk usage in bytes. If None the current usage is measured.
+        """
+        if self.budget is None:
+            return
+        usage = self.usage() if usage is None else usage
+        if usage > self.budget:
+            raise RuntimeError(
+                f'Scratch disk usage of {usage / 1024**3:.2f} GB exceeds the budget of {self.budget / 1024**3:.2f} GB'
+            )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Records the wall time and peak disk usage of a processing stage.
+
+        The budget is enforced before the stage starts. An overrun while the stage runs is only logged, so a stage that
+        has finished is never discarded; use `step_done` to enforce the budget between the steps of a stage.
+
+        Args:
+            name: Name of the stage.
+        """
+        self.check_budget()
+        start = time.perf_counter()
+        peak = self.usage()
+        stop = threading.Event()
+
+        def sample() -> None:
+            nonlocal peak
+            while not stop.wait(self.interval):
+                peak = max(peak, self.usage())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            peak = max(peak, self.usage())
+            self.peaks[name] = peak
+            self.durations[name] = time.perf_counter() - start
+            log.info(f'Peak disk usage during {name}: {peak / 1024**3:.2f} GB')
+        if self.budget is not None and peak > self.budget:
+            log.warning(
+                f'Peak disk usage during {name} of {peak / 1024**3:.2f} GB exceeded the budget of '
+                f'{self.budget / 1024**3:.2f} GB'
+            )
+
+    def register(self, paths: Iterable[str | os.PathLike], consumers: Iterable[str]) -> None:
+        """Registers the stages that still need to read a set of files.
+
+        Args:
+            paths: Paths to the files.
+            consumers: Names of the stages that read the files.
+        """
+        consumers = set(consumers)
+        for path in paths:
+            self.consumers.setdefault(Path(path), set()).update(consumers)
+
+    def release(self, consumer: str) -> list[Path]:
+        """Marks a stage as finished and deletes the files it was the last consumer of.
+
+        Args:
+            consumer: Name of the finished stage.
+
+        Returns:
+            List with the deleted files.
+        """
+        removed = []
+        with self._lock:
+            for path, pending in list(self.consumers.items()):
+                if consumer not in pending:
+                    continue
+                pending.discard(consumer)
+                if not pending:
+                    path.unlink(missing_ok=True)
+                    del self.consumers[path]
+                    removed.append(path)
+
+        if removed:
+            log.info(f'Deleted {len(removed)} file(s) no longer needed after {consumer}')
+        return removed
+
+    def step_done(self, consumer: str) -> list[Path]:
+        """Releases the files of a finished step and checks the budget before the next step starts.
+
+        Args:
+            consumer: Name of the finished step.
+
+        Returns:
+            List with the deleted files.
+        """
+        removed = self.release(consumer)
+        self.check_budget()
+        return removed
+
+    def hot_dir(self, name: str) -> Path:
+        """Creates a folder for hot intermediates inside root, placing it on the scratch location if there is one.
+
+        Args:
+            name: Name of the folder inside root.
+
+        Returns:
+            Path to the folder inside root, a symbolic link to the scratch location if there is one.
+        """
+        path = self.root / name
+        if self.scratch_dir is None:
+            path.mkdir(parents=True, exist_ok=True)
+            return path
+
+        target = (self.scratch_dir / f'{self.root.name}_{name}').resolve()
+        target.mkdir(parents=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.symlink_to(target, target_is_directory=True)
+        self.hot_dirs.append(target)
+        return path
+
+    def cleanup(self) -> None:
+        """Deletes the hot intermediates stored on the scratch location."""
+        for target in self.hot_dirs:
+            shutil.rmtree(target, ignore_errors=True)
+        self.hot_dirs = []
+
+    def log_stages(self) -> None:
+        """Logs the wall time and peak disk usage of every stage."""
+        for name, peak in self.peaks.items():
+            log.info(f'{name:<22}{self.durations[name]:>10.1f} s{peak / 1024**3:>10.2f} GB')
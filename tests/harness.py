@@ -0,0 +1,420 @@
+"""Offline end-to-end throughput harness for process_mintpy.
+
+Synthetic multiburst products are served from a fake HyP3 job API backed by a local HTTP server, or from a local S3
+stand-in (moto), and the full pipeline is run at several stack sizes. The synthetic data only depends on the seed, so
+every run with the same arguments processes the same products.
+
+Example:
+    python tests/harness.py --sizes 10 30 100 --source hyp3 --report throughput.jsonl
+"""
+
+import datetime as dt
+import functools
+import http.server
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import boto3
+import hyp3_sdk as sdk
+import numpy as np
+from osgeo import gdal, osr
+
+import hyp3_mintpy
+from hyp3_mintpy.process import process_mintpy
+from hyp3_mintpy.workspace import Workspace
+
+
+gdal.UseExceptions()
+
+EPSG = 32601
+ORIGIN = (600000.0, 5920000.0)
+PIXEL_SIZE = 80.0
+BURST = '136231_IW2'
+FIRST_DATE = dt.date(2020, 1, 1)
+REVISIT = dt.timedelta(days=12)
+WAVELENGTH = 0.0555
+BUCKET = 'volcsarvatory-data-test'
+BUCKET_PATH = 'multiburst_products/'
+
+
+def get_pairs(size: int) -> list[tuple[dt.date, dt.date]]:
+    """Gets a connected small baseline network with up to three connections per date.
+
+    Args:
+        size: Number of interferograms.
+
+    Returns:
+        List with the reference and secondary dates of each interferogram.
+    """
+    pairs: list[tuple[dt.date, dt.date]] = []
+    index = 0
+    while len(pairs) < size:
+        for connection in range(1, 4):
+            if len(pairs) < size:
+                pairs.append((FIRST_DATE + index * REVISIT, FIRST_DATE + (index + connection) * REVISIT))
+        index += 1
+    return pairs
+
+
+def write_tiff(path: Path, data: np.ndarray, origin: tuple[float, float] = ORIGIN, nodata: float | None = None) -> None:
+    """Writes a single band GeoTIFF in the harness projection.
+
+    Args:
+        path: Path for the GeoTIFF.
+        data: Raster values.
+        origin: Upper left corner coordinates.
+        nodata: No-data value.
+    """
+    data_type = gdal.GDT_Byte if data.dtype == np.uint8 else gdal.GDT_Float32
+    ds = gdal.GetDriverByName('GTiff').Create(str(path), data.shape[1], data.shape[0], 1, data_type)
+    ds.SetGeoTransform((origin[0], PIXEL_SIZE, 0.0, origin[1], 0.0, -PIXEL_SIZE))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(EPSG)
+    ds.SetProjection(srs.ExportToWkt())
+    band = ds.GetRasterBand(1)
+    if nodata is not None:
+        band.SetNoDataValue(nodata)
+    band.WriteArray(data)
+    ds = None
+
+
+def get_metadata(reference: dt.date, secondary: dt.date, baseline: float) -> str:
+    """Gets the contents of a HyP3 multiburst metadata file.
+
+    Args:
+        reference: Reference date.
+        secondary: Secondary date.
+        baseline: Perpendicular baseline in meters.
+
+    Returns:
+        Metadata file contents.
+    """
+    return (
+        f'Reference Granule: S1_{BURST}_{reference:%Y%m%d}T022312_VV_7C85-BURST\n'
+        f'Secondary Granule: S1_{BURST}_{secondary:%Y%m%d}T022313_VV_5D11-BURST\n'
+        'Reference Pass Direction: DESCENDING\n'
+        'Reference Orbit Number: 32861\n'
+        'Secondary Pass Direction: DESCENDING\n'
+        'Secondary Orbit Number: 33036\n'
+        f'Baseline: {baseline:.4f}\n'
+        'UTC time: 8593.5\n'
+        'Heading: -166.8\n'
+        'Spacecraft height: 693000.0\n'
+        'Earth radius at nadir: 6337286.6\n'
+        'Slant range near: 799741.9\n'
+        'Slant range center: 877375.2\n'
+        'Slant range far: 955008.5\n'
+        'Range looks: 20\n'
+        'Azimuth looks: 4\n'
+        'INSAR phase filter: yes\n'
+        'Phase filter parameter: 0.5\n'
+        'Range bandpass filter: no\n'
+        'Azimuth bandpass filter: no\n'
+        'DEM source: GLO_30\n'
+        'DEM resolution (m): 30\n'
+        'Unwrapping type: snaphu_mcf\n'
+        'Speckle filter: yes\n'
+        'Water mask: yes\n'
+    )
+
+
+def make_product(
+    directory: Path, reference: dt.date, secondary: dt.date, shape: tuple[int, int], rng: np.random.Generator
+) -> Path:
+    """Creates a zipped synthetic multiburst product.
+
+    Args:
+        directory: Folder for the zip file.
+        reference: Reference date.
+        secondary: Secondary date.
+        shape: Number of rows and columns of the rasters.
+        rng: Random number generator.
+
+    Returns:
+        Path for the zip file.
+    """
+    name = (
+        f'S1_136_000000s1n00-136231s2n02-000000s3n00_IW_{reference:%Y%m%d}_{secondary:%Y%m%d}_VV_INT80_'
+        f'{rng.integers(0, 16**4):04X}'
+    )
+    product = directory / name
+    product.mkdir(parents=True)
+
+    rows, cols = np.mgrid[0 : shape[0], 0 : shape[1]]
+    bump = np.exp(-(((rows - shape[0] / 2) ** 2 + (cols - shape[1] / 2) ** 2) / (2 * (min(shape) / 6) ** 2)))
+    years = (secondary - reference).days / 365.25
+    displacement = 0.02 * years * bump
+    unw = -4 * np.pi / WAVELENGTH * displacement + rng.normal(0, 0.3, shape)
+    corr = np.clip(0.4 + 0.5 * bump + rng.normal(0, 0.1, shape), 0.05, 1.0)
+    water_mask = np.ones(shape, dtype=np.uint8)
+    water_mask[:, : shape[1] // 8] = 0
+
+    # shift every product by a few pixels so the pipeline has to subset them to the common extent
+    shift = rng.integers(0, 3, size=2) * PIXEL_SIZE
+    origin = (ORIGIN[0] + shift[0], ORIGIN[1] - shift[1])
+
+    write_tiff(product / f'{name}_unw_phase.tif', unw.astype(np.float32), origin, nodata=0.0)
+    write_tiff(product / f'{name}_corr.tif', corr.astype(np.float32), origin, nodata=0.0)
+    write_tiff(product / f'{name}_conncomp.tif', np.ones(shape, dtype=np.uint8), origin)
+    write_tiff(product / f'{name}_dem.tif', (1000 * bump).astype(np.float32), origin)
+    write_tiff(product / f'{name}_lv_theta.tif', np.full(shape, 0.65, dtype=np.float32), origin)
+    write_tiff(product / f'{name}_lv_phi.tif', np.full(shape, -2.9, dtype=np.float32), origin)
+    write_tiff(product / f'{name}_water_mask.tif', water_mask, origin)
+    (product / f'{name}.txt').write_text(get_metadata(reference, secondary, rng.uniform(-150, 150)))
+    (product / f'{name}.README.md.txt').write_text('Synthetic product created by the hyp3-mintpy harness.\n')
+
+    zip_file = shutil.make_archive(base_name=str(product), format='zip', root_dir=directory, base_dir=name)
+    shutil.rmtree(product)
+    return Path(zip_file)
+
+
+def make_stack(directory: Path, size: int, shape: tuple[int, int] = (128, 128), seed: int = 0) -> list[Path]:
+    """Creates a reproducible stack of zipped synthetic multiburst products.
+
+    Args:
+        directory: Folder for the zip files.
+        size: Number of interferograms.
+        shape: Number of rows and columns of the rasters.
+        seed: Seed for the synthetic data.
+
+    Returns:
+        List with the paths of the zip files.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    return [
+        make_product(directory, reference, secondary, shape, np.random.default_rng([seed, index]))
+        for index, (reference, secondary) in enumerate(get_pairs(size))
+    ]
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve_directory(directory: Path) -> Iterator[str]:
+    """Serves the files in a directory from a local HTTP server.
+
+    Args:
+        directory: Folder to serve.
+
+    Returns:
+        Base URL of the server.
+    """
+    handler = functools.partial(_QuietHandler, directory=str(directory))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class FakeHyP3:
+    """Stand-in for hyp3_sdk.HyP3 that only supports finding jobs by name."""
+
+    def __init__(self, jobs: dict[str, sdk.Batch]) -> None:
+        """Creates the fake API.
+
+        Args:
+            jobs: Dictionary key: job name, value: batch of jobs with that name.
+        """
+        self.jobs = jobs
+
+    def find_jobs(self, name: str | None = None, **kwargs: object) -> sdk.Batch:
+        """Finds the jobs with a given name."""
+        return self.jobs.get(str(name), sdk.Batch())
+
+
+def get_batch(products: list[Path], job_name: str, base_url: str) -> sdk.Batch:
+    """Creates a batch of succeeded INSAR_ISCE_MULTI_BURST jobs whose files are served from base_url.
+
+    Args:
+        products: Paths of the zip files.
+        job_name: Name of the jobs.
+        base_url: Base URL of the server that serves the zip files.
+
+    Returns:
+        Batch with one job per product.
+    """
+    now = dt.datetime.now(dt.timezone.utc)
+    jobs = [
+        sdk.Job.from_dict(
+            {
+                'job_type': 'INSAR_ISCE_MULTI_BURST',
+                'job_id': f'{index:08d}-0000-0000-0000-000000000000',
+                'request_time': now.isoformat(),
+                'expiration_time': (now + dt.timedelta(days=14)).isoformat(),
+                'status_code': 'SUCCEEDED',
+                'user_id': 'harness',
+                'name': job_name,
+                'files': [
+                    {'url': f'{base_url}/{product.name}', 'filename': product.name, 'size': product.stat().st_size}
+                ],
+            }
+        )
+        for index, product in enumerate(products)
+    ]
+    return sdk.Batch(jobs)
+
+
+@contextmanager
+def hyp3_stand_in(products: list[Path], job_name: str) -> Iterator[None]:
+    """Serves the products as HyP3 jobs for download_job_pairs.
+
+    Args:
+        products: Paths of the zip files, all in the same folder.
+        job_name: Name of the HyP3 jobs.
+    """
+    with serve_directory(products[0].parent) as base_url:
+        fake = FakeHyP3({job_name: get_batch(products, job_name, base_url)})
+        with patch('hyp3_sdk.HyP3', return_value=fake):
+            yield
+
+
+@contextmanager
+def s3_stand_in(products: list[Path], key: str) -> Iterator[None]:
+    """Serves the products from a local S3 stand-in for download_bucket_pairs.
+
+    Args:
+        products: Paths of the zip files.
+        key: Folder name for the products in the bucket.
+    """
+    from moto import mock_aws
+
+    with mock_aws():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket=BUCKET)
+        for product in products:
+            s3.upload_file(str(product), BUCKET, f'{BUCKET_PATH}{key}/{product.name}')
+        yield
+
+
+@contextmanager
+def working_directory(path: Path) -> Iterator[None]:
+    """Changes the working directory for the duration of the context."""
+    cwd = Path.cwd()
+    path.mkdir(parents=True, exist_ok=True)
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(cwd)
+
+
+def run_pipeline(
+    directory: Path,
+    size: int,
+    source: str = 'hyp3',
+    shape: tuple[int, int] = (128, 128),
+    seed: int = 0,
+    profile: str = 'fast',
+    min_coherence: float = 0.01,
+) -> dict:
+    """Runs process_mintpy on a synthetic stack and measures its throughput.
+
+    Args:
+        directory: Empty folder for the synthetic products and the processing.
+        size: Number of interferograms.
+        source: Where the products are pulled from, hyp3 or s3.
+        shape: Number of rows and columns of the rasters.
+        seed: Seed for the synthetic data.
+        profile: MintPy processing profile.
+        min_coherence: Minimum coherence for timeseries processing.
+
+    Returns:
+        Dictionary with the end to end and per stage throughput.
+    """
+    products = make_stack(directory / 'products', size, shape, seed)
+    input_bytes = sum(product.stat().st_size for product in products)
+    name = f'harness_{size}'
+
+    workspaces: list[Workspace] = []
+
+    class RecordingWorkspace(Workspace):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            workspaces.append(self)
+
+    stand_in = hyp3_stand_in(products, name) if source == 'hyp3' else s3_stand_in(products, name)
+    with stand_in, patch('hyp3_mintpy.process.Workspace', RecordingWorkspace), working_directory(directory / 'run'):
+        start = time.perf_counter()
+        product_file = process_mintpy(
+            job_name=name if source == 'hyp3' else None,
+            prefix=name if source == 's3' else None,
+            min_coherence=min_coherence,
+            profile=profile,
+        )
+        seconds = time.perf_counter() - start
+        output_bytes = product_file.stat().st_size
+
+    workspace = workspaces[0]
+    return {
+        'size': size,
+        'source': source,
+        'shape': list(shape),
+        'seed': seed,
+        'profile': profile,
+        'input_mb': input_bytes / 1024**2,
+        'output_mb': output_bytes / 1024**2,
+        'seconds': seconds,
+        'interferograms_per_second': size / seconds,
+        'stages': {
+            stage: {
+                'seconds': workspace.durations[stage],
+                'interferograms_per_second': size / workspace.durations[stage],
+                'peak_disk_gb': workspace.peaks[stage] / 1024**3,
+            }
+            for stage in workspace.durations
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'hyp3_mintpy': hyp3_mintpy.__version__,
+            'gdal': gdal.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+    }
+
+
+def main() -> None:
+    """Runs the throughput harness at several stack sizes."""
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 30, 100], help='Numbers of interferograms')
+    parser.add_argument('--source', choices=['hyp3', 's3'], default='hyp3', help='Where the products are pulled from')
+    parser.add_argument('--shape', type=int, nargs=2, default=[128, 128], help='Rows and columns of the rasters')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic data')
+    parser.add_argument('--profile', default='fast', help='MintPy processing profile')
+    parser.add_argument('--min-coherence', type=float, default=0.01, help='The minimum coherence to process')
+    parser.add_argument('--report', type=Path, default=Path('throughput.jsonl'), help='JSON lines report file')
+    args = parser.parse_args()
+
+    report = args.report.resolve()
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            result = run_pipeline(
+                Path(directory), size, args.source, tuple(args.shape), args.seed, args.profile, args.min_coherence
+            )
+        with report.open('a') as f:
+            f.write(json.dumps(result) + '\n')
+
+        print(f'{size} interferograms: {result["seconds"]:.1f} s, {result["interferograms_per_second"]:.2f} ifg/s')
+        for stage, stats in result['stages'].items():
+            print(f'  {stage:<12}{stats["seconds"]:>10.1f} s{stats["interferograms_per_second"]:>10.2f} ifg/s')
+
+
+if __name__ == '__main__':
+    main()
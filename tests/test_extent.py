@@ -0,0 +1,53 @@
+import numpy as np
+import shapely
+
+from hyp3_mintpy import extent
+
+
+def test_get_bounds():
+    geoms = [shapely.box(0, 0, 2, 2), shapely.box(1, -1, 3, 1)]
+    bounds = extent.get_bounds(geoms)
+
+    assert bounds.shape == (2, 4)
+    assert np.array_equal(bounds, [[0, 0, 2, 2], [1, -1, 3, 1]])
+
+
+def test_get_common_extent():
+    bounds = np.array([[0, 0, 2, 2], [1, -1, 3, 1]], dtype=float)
+
+    assert extent.get_common_extent(bounds) == [1.0, 0.0, 2.0, 1.0]
+
+
+def test_find_uncontained():
+    geoms = [shapely.box(0, 0, 10, 10), shapely.box(2, 2, 4, 4), shapely.box(-5, -5, 5, 5)]
+
+    assert list(extent.find_uncontained([1, 1, 5, 5], geoms)) == [1]
+    assert list(extent.find_uncontained([2.5, 2.5, 3.5, 3.5], geoms)) == []
+    assert list(extent.find_uncontained([20, 20, 30, 30], geoms)) == [0, 1, 2]
+
+
+def test_get_coverage_groups():
+    geoms = [
+        shapely.box(10, 10, 12, 12),
+        shapely.box(0, 0, 2, 2),
+        shapely.box(11, 11, 13, 13),
+        shapely.box(1, 1, 3, 3),
+        shapely.box(12.5, 12.5, 14, 14),
+    ]
+    groups = extent.get_coverage_groups(geoms)
+
+    assert list(groups) == [0, 1, 0, 1, 0]
+
+    extents = extent.get_group_extents(extent.get_bounds(geoms), groups)
+    assert extents[0] is None
+    assert extents[1] == [1.0, 1.0, 2.0, 2.0]
+
+
+def test_get_coverage_groups_overlapping_stack():
+    geoms = [shapely.box(i * 0.001, 0, 10 + i * 0.001, 10) for i in range(2000)]
+    geoms.append(shapely.box(100, 100, 101, 101))
+
+    groups = extent.get_coverage_groups(geoms)
+    assert not groups[:-1].any()
+    assert groups[-1] == 1
+    assert len(extent.get_coverage_groups([])) == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from harness import get_pairs, hyp3_stand_in, make_stack, s3_stand_in
+from hyp3_mintpy.process import check_product, download_bucket_pairs, download_job_pairs
+
+
+def test_get_pairs():
+    pairs = get_pairs(10)
+
+    assert len(pairs) == 10
+    assert len(set(pairs)) == 10
+    assert all(reference < secondary for reference, secondary in pairs)
+
+
+def test_make_stack(tmp_path):
+    first = make_stack(tmp_path / 'first', 4, shape=(16, 16), seed=1)
+    second = make_stack(tmp_path / 'second', 4, shape=(16, 16), seed=1)
+
+    assert [p.name for p in first] == [p.name for p in second]
+    assert all(check_product(p.name) for p in first)
+
+
+def test_hyp3_stand_in(tmp_path, monkeypatch):
+    products = make_stack(tmp_path / 'products', 3, shape=(16, 16))
+    monkeypatch.chdir(tmp_path)
+    with hyp3_stand_in(products, 'harness_3'):
+        folder = download_job_pairs('harness_3')
+
+    folders = sorted((tmp_path / folder).glob('S1_136231_IW2_*'))
+    assert len(folders) == 3
+    assert len(list(folders[0].glob('*_unw_phase.tif'))) == 1
+
+
+def test_s3_stand_in(tmp_path, monkeypatch):
+    pytest.importorskip('moto')
+    products = make_stack(tmp_path / 'products', 3, shape=(16, 16))
+    monkeypatch.chdir(tmp_path)
+    with s3_stand_in(products, 'harness_3'):
+        folder = download_bucket_pairs('harness_3')
+
+    assert len(list((tmp_path / folder).glob('S1_136231_IW2_*'))) == 3
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from osgeo import gdal
+
+from harness import write_tiff
+from hyp3_mintpy import masking
+
+
+def test_build_stack_mask(tmp_path):
+    first = np.full((50, 40), 0.6, dtype=np.float32)
+    second = np.full((50, 40), 0.4, dtype=np.float32)
+    first[:10] = 0.1
+    second[:10] = 0.1
+    second[10:20] = 0
+    first[40:] = 0
+    second[40:] = 0
+    write_tiff(tmp_path / 'first_corr.tif', first)
+    write_tiff(tmp_path / 'second_corr.tif', second)
+
+    water = np.ones((50, 40), dtype=np.uint8)
+    water[:, 30:] = 0
+    write_tiff(tmp_path / 'water_mask.tif', water)
+
+    corr = [tmp_path / 'first_corr.tif', tmp_path / 'second_corr.tif']
+    mask = masking.build_stack_mask(corr, min_coherence=0.3, block_rows=7)
+    assert mask.shape == (50, 40)
+    assert not mask[:10].any()
+    assert mask[10:40].all()
+    assert not mask[40:].any()
+
+    mask = masking.build_stack_mask(corr, tmp_path / 'water_mask.tif', min_coherence=0.3, block_rows=7)
+    assert mask[10:40, :30].all()
+    assert not mask[:, 30:].any()
+
+
+def test_build_stack_mask_grid(tmp_path):
+    write_tiff(tmp_path / 'first_corr.tif', np.ones((50, 40), dtype=np.float32))
+    write_tiff(tmp_path / 'second_corr.tif', np.ones((50, 41), dtype=np.float32))
+
+    with pytest.raises(ValueError, match='same grid'):
+        masking.build_stack_mask([tmp_path / 'first_corr.tif', tmp_path / 'second_corr.tif'])
+
+
+def test_write_masked(tmp_path):
+    data = np.arange(2000, dtype=np.float32).reshape(50, 40) + 1
+    write_tiff(tmp_path / 'unw_phase.tif', data, nodata=0)
+    mask = np.ones((50, 40), dtype=bool)
+    mask[5:25, 10:20] = False
+
+    masking.write_masked(tmp_path / 'unw_phase.tif', tmp_path / 'masked.tif', mask, block_rows=7)
+
+    ds = gdal.Open(str(tmp_path / 'masked.tif'))
+    band = ds.GetRasterBand(1)
+    masked = band.ReadAsArray()
+    assert band.GetNoDataValue() == 0
+    assert ds.GetGeoTransform() == (600000.0, 80.0, 0.0, 5920000.0, 0.0, -80.0)
+    assert ds.GetMetadata('IMAGE_STRUCTURE')['COMPRESSION'] == 'DEFLATE'
+    assert band.GetBlockSize() != [40, 1]
+    assert np.all(masked[~mask] == 0)
+    assert np.array_equal(masked[mask], data[mask])
+
+
+def test_write_masked_grid(tmp_path):
+    write_tiff(tmp_path / 'corr.tif', np.ones((50, 40), dtype=np.float32))
+
+    with pytest.raises(ValueError, match='same grid'):
+        masking.write_masked(tmp_path / 'corr.tif', tmp_path / 'masked.tif', np.ones((40, 40), dtype=bool))
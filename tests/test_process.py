@@ -2,11 +2,23 @@ import subprocess
 from pathlib import Path
 
 import geopandas as gpd
+import numpy as np
 import opensarlab_lib as osl
 import pytest
+import shapely
+from osgeo import gdal
 
+from harness import write_tiff
 from hyp3_mintpy import util
-from hyp3_mintpy.process import check_extent, check_product, rename_products, set_same_epsg, set_same_frame, write_cfg
+from hyp3_mintpy.process import (
+    check_coverage_groups,
+    check_extent,
+    check_product,
+    rename_products,
+    set_same_epsg,
+    set_same_frame,
+    write_cfg,
+)
 
 
 def test_rename_products_new():
@@ -71,6 +83,21 @@ def test_check_extent(test_data_directory):
     assert check_extent(gdf, [670000.0, 5900000.0, 840000.0, 5950000.0]) is None  # type: ignore
 
 
+def test_check_coverage_groups():
+    tiff_path = [Path(f'pair{i}_unw_phase.tif') for i in range(3)]
+    geometries = [shapely.box(0, 0, 2, 2), shapely.box(1, 1, 3, 3)]
+    gdf = gpd.GeoDataFrame({'tiff_path': tiff_path[:2], 'geometry': geometries})
+    assert check_coverage_groups(gdf) is None  # type: ignore
+
+    gdf = gpd.GeoDataFrame({'tiff_path': tiff_path, 'geometry': [*geometries, shapely.box(10, 10, 12, 12)]})
+    with pytest.raises(Exception, match='2 disjoint coverage groups'):
+        check_coverage_groups(gdf)
+
+    gdf = gpd.GeoDataFrame({'tiff_path': tiff_path, 'geometry': [*geometries, shapely.box(2.5, 2.5, 4, 4)]})
+    with pytest.raises(Exception, match='coverage group 0 has no common area'):
+        check_coverage_groups(gdf)
+
+
 def test_set_same_frame(test_data_directory):
     data = test_data_directory
 
@@ -95,6 +122,42 @@ def test_set_same_frame(test_data_directory):
     subprocess.call('rm -rf test', shell=True)
 
 
+def test_set_same_frame_mask(tmp_path):
+    corr = np.full((40, 40), 0.8, dtype=np.float32)
+    corr[:, :20] = 0.1
+    water_mask = np.ones((40, 40), dtype=np.uint8)
+    water_mask[30:] = 0
+    for index in range(2):
+        product = tmp_path / f'S1_136231_IW2_2020010{index + 1}_2020011{index + 1}_VV_INT80_0000'
+        product.mkdir()
+        write_tiff(product / f'{product.name}_unw_phase.tif', np.ones((40, 40), dtype=np.float32), nodata=0.0)
+        write_tiff(product / f'{product.name}_corr.tif', corr, nodata=0.0)
+        write_tiff(product / f'{product.name}_conncomp.tif', np.ones((40, 40), dtype=np.uint8))
+        write_tiff(product / f'{product.name}_water_mask.tif', water_mask)
+
+    set_same_frame(str(tmp_path), wgs84=True, mask_coherence=0.3)
+
+    for path in tmp_path.glob('*/*.tif'):
+        ds = gdal.Open(str(path))
+        assert util.get_epsg(str(path)) == '4326'
+        assert ds.GetMetadata('IMAGE_STRUCTURE')['COMPRESSION'] == 'DEFLATE'
+        assert ds.GetRasterBand(1).GetBlockSize()[1] > 1
+    assert not list(tmp_path.glob('*/*.vrt'))
+
+    for path in tmp_path.glob('*/*_corr.tif'):
+        band = gdal.Open(str(path)).GetRasterBand(1)
+        data = band.ReadAsArray()
+        assert band.GetNoDataValue() == 0
+        assert not np.isclose(data, 0.1).any()
+        assert np.isclose(data, 0.8).any()
+        assert (data == 0).any()
+
+    for path in tmp_path.glob('*/*_unw_phase.tif'):
+        band = gdal.Open(str(path)).GetRasterBand(1)
+        assert band.GetNoDataValue() == 0
+        assert (band.ReadAsArray() == 0).sum() > 0.5 * band.XSize * band.YSize
+
+
 def test_write_cfg():
     job_name = 'test_job'
     min_coherence = '0.5'
@@ -126,3 +189,29 @@ def test_check_product():
     assert check_product(filename, '2019-01-01', '2021-01-01')
     assert not check_product(filename, '2019-01-01', '2020-06-10')
     assert not check_product(filename, '2020-06-10', '2021-01-01')
+
+
+def test_write_cfg_fast_profile():
+    job_name = 'test_job'
+    write_cfg(job_name, '0.5', 'fast')
+
+    with Path(f'{job_name}/MintPy/{job_name}.txt').open() as cfg:
+        lines = cfg.readlines()
+
+    assert 'mintpy.plot = no\n' in lines
+    assert 'mintpy.topographicResidual = no\n' in lines
+
+    subprocess.call(f'rm -rf {job_name}', shell=True)
+
+
+def test_write_cfg_tile():
+    job_name = 'test_job'
+    write_cfg(job_name, '0.5', work_dir='MintPy_tile0', subset=[-168.5, 53.0, -168.0, 53.5], reference_date='20200101')
+
+    with Path(f'{job_name}/MintPy_tile0/{job_name}.txt').open() as cfg:
+        lines = cfg.readlines()
+
+    assert 'mintpy.subset.lalo = 53.0:53.5,-168.5:-168.0\n' in lines
+    assert 'mintpy.reference.date = 20200101\n' in lines
+
+    subprocess.call(f'rm -rf {job_name}', shell=True)
@@ -0,0 +1,69 @@
+import h5py
+import numpy as np
+import pytest
+
+from hyp3_mintpy import repack
+
+
+def make_timeseries(path):
+    rng = np.random.default_rng(0)
+    data = np.round(rng.normal(0, 0.01, (5, 200, 150)), 3).astype(np.float32)
+    data[:, :20, :] = np.nan
+    with h5py.File(path, 'w') as f:
+        f.attrs['FILE_TYPE'] = 'timeseries'
+        f.attrs['LENGTH'] = '200'
+        f.create_dataset('timeseries', data=data)
+        f.create_dataset('date', data=np.array([b'20200101', b'20200113', b'20200125', b'20200206', b'20200218']))
+        f.create_dataset('bperp', data=np.arange(5, dtype=np.float32))
+        f.create_group('extra').create_dataset('mask', data=np.ones((200, 150), dtype=np.bool_))
+        f['timeseries'].attrs['UNIT'] = 'm'
+
+
+def test_get_chunks():
+    assert repack.get_chunks((40, 1000, 2000)) == (16, 128, 128)
+    assert repack.get_chunks((5, 50, 60)) == (5, 50, 60)
+    assert repack.get_chunks((1000, 2000)) == (256, 256)
+
+
+def test_repack_file(tmp_path):
+    path = tmp_path / 'timeseries.h5'
+    make_timeseries(path)
+    original = tmp_path / 'original.h5'
+    original.write_bytes(path.read_bytes())
+
+    result = repack.repack_file(path)
+
+    assert result.size_after < result.size_before
+    assert repack.check_round_trip(original, path)
+    with h5py.File(path, 'r') as f:
+        assert f['timeseries'].chunks == (5, 128, 128)
+        assert f['timeseries'].compression == 'gzip'
+        assert f['timeseries'].attrs['UNIT'] == 'm'
+        assert f.attrs['FILE_TYPE'] == 'timeseries'
+
+    with pytest.raises(ValueError, match='Unknown compression'):
+        repack.repack_file(path, compression='zip')
+
+
+def test_check_round_trip(tmp_path):
+    first = tmp_path / 'first.h5'
+    second = tmp_path / 'second.h5'
+    make_timeseries(first)
+    make_timeseries(second)
+    assert repack.check_round_trip(first, second)
+
+    with h5py.File(second, 'a') as f:
+        f['timeseries'][0, 100, 100] = 1.0
+    assert not repack.check_round_trip(first, second)
+
+
+def test_repack_files(tmp_path):
+    paths = [tmp_path / 'a.h5', tmp_path / 'b.h5']
+    for path in paths:
+        make_timeseries(path)
+
+    results = repack.repack_files(paths, compression='lzf', workers=2)
+
+    assert [result.path for result in results] == paths
+    assert all(result.size_after < result.size_before for result in results)
+    assert repack.repack_files([]) == []
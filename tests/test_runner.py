@@ -0,0 +1,46 @@
+import logging
+import subprocess
+
+import pytest
+
+from hyp3_mintpy import runner
+
+
+def test_get_steps():
+    assert runner.get_steps() == list(runner.STEPS)
+
+    fast = runner.get_steps('fast')
+    assert 'plot' not in fast
+    assert 'quick_overview' not in fast
+    assert fast[0] == 'load_data'
+    assert 'velocity' in fast
+
+    assert runner.get_steps('fast', ['velocity', 'load_data']) == ['load_data', 'velocity']
+
+    with pytest.raises(ValueError, match='Unknown MintPy step'):
+        runner.get_steps(steps=['not_a_step'])
+
+    with pytest.raises(ValueError, match='Unknown MintPy profile'):
+        runner.get_steps('slow')
+
+
+def test_get_profile_options():
+    assert runner.get_profile_options('default') == {}
+    assert runner.get_profile_options('fast')['mintpy.plot'] == 'no'
+
+    with pytest.raises(ValueError, match='Unknown MintPy profile'):
+        runner.get_profile_options('slow')
+
+
+def test_run_steps_logs_on_failure(monkeypatch, caplog):
+    def run_step(config, work_dir, step):
+        if step == 'modify_network':
+            raise subprocess.CalledProcessError(1, ['smallbaselineApp.py'])
+        return runner.StepResult(step=step, seconds=1.0, max_rss_mb=10.0)
+
+    monkeypatch.setattr(runner, 'run_step', run_step)
+    with caplog.at_level(logging.INFO, logger='hyp3_mintpy.runner'), pytest.raises(subprocess.CalledProcessError):
+        runner.run_steps('test.txt', 'MintPy', steps=['load_data', 'modify_network', 'velocity'])
+
+    assert 'load_data' in caplog.text
+    assert 'velocity' not in caplog.text
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from harness import write_tiff
+from hyp3_mintpy import screening
+
+
+def make_pair(folder: Path, coherence: float, valid_rows: int, n_components: int = 1):
+    folder.mkdir(parents=True)
+    unw = np.ones((100, 100), dtype=np.float32)
+    unw[valid_rows:] = 0
+    conncomp = np.zeros((100, 100), dtype=np.uint8)
+    for component in range(n_components):
+        conncomp[:, component * 10 : (component + 1) * 10] = component + 1
+    write_tiff(folder / f'{folder.name}_unw_phase.tif', unw, nodata=0)
+    write_tiff(folder / f'{folder.name}_corr.tif', np.full((100, 100), coherence, dtype=np.float32))
+    write_tiff(folder / f'{folder.name}_conncomp.tif', conncomp)
+
+
+def test_read_decimated(tmp_path):
+    data = np.arange(10000, dtype=np.float32).reshape(100, 100)
+    data[:8, :8] = -1
+    write_tiff(tmp_path / 'test.tif', data, nodata=-1)
+
+    decimated = screening.read_decimated(tmp_path / 'test.tif', max_size=25)
+    assert decimated.shape == (25, 25)
+    assert np.isnan(decimated[0, 0])
+
+
+def test_get_pair_stats(tmp_path):
+    make_pair(tmp_path / 'S1_pair', 0.6, valid_rows=50, n_components=3)
+    stats = screening.get_pair_stats(tmp_path / 'S1_pair', max_size=50)
+
+    assert stats.mean_coherence == pytest.approx(0.6)
+    assert stats.median_coherence == pytest.approx(0.6)
+    assert stats.valid_fraction == pytest.approx(0.5)
+    assert stats.n_components == 3
+
+
+def test_screen_pairs(tmp_path):
+    make_pair(tmp_path / 'S1_good', 0.7, valid_rows=100)
+    make_pair(tmp_path / 'S1_incoherent', 0.1, valid_rows=100)
+    make_pair(tmp_path / 'S1_empty', 0.7, valid_rows=10)
+    make_pair(tmp_path / 'S1_fragmented', 0.7, valid_rows=100, n_components=8)
+
+    kept = screening.screen_pairs(tmp_path, min_mean_coherence=0.3, min_valid_fraction=0.5, max_components=5)
+
+    assert [pair.folder.name for pair in kept] == ['S1_good']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['S1_good']
+
+    with pytest.raises(ValueError, match='No interferogram passed'):
+        screening.screen_pairs(tmp_path, min_mean_coherence=0.9)
+    assert (tmp_path / 'S1_good').exists()
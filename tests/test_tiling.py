@@ -0,0 +1,87 @@
+import h5py
+import numpy as np
+import pytest
+
+from hyp3_mintpy import tiling
+
+
+def test_get_tiles():
+    tiles = tiling.get_tiles([0.0, 0.0, 4.0, 2.0], 2, 2, overlap=0.25)
+
+    assert len(tiles) == 4
+    assert tiles[0] == [0.0, 0.875, 2.25, 2.0]
+    assert tiles[3] == [1.75, 0.0, 4.0, 1.125]
+    assert tiling.get_tiles([0.0, 0.0, 4.0, 2.0], 1, 1) == [[0.0, 0.0, 4.0, 2.0]]
+
+    with pytest.raises(ValueError, match='at least 1'):
+        tiling.get_tiles([0.0, 0.0, 1.0, 1.0], 0, 2)
+
+
+def test_mosaic_arrays():
+    truth = np.arange(30, dtype=np.float32).reshape(5, 6)
+    arrays = [truth[:, :4], truth[:, 2:] + 10]
+
+    placed = tiling.mosaic_arrays(arrays, [(0, 0), (0, 2)], (5, 6))
+    assert np.array_equal(placed[:, :4], truth[:, :4])
+    assert np.array_equal(placed[:, 4:], truth[:, 4:] + 10)
+
+    aligned = tiling.mosaic_arrays(arrays, [(0, 0), (0, 2)], (5, 6), align=True)
+    assert np.allclose(aligned, truth)
+
+
+def write_tile(path, data, row, col, ref, ref_date='20200101'):
+    with h5py.File(path, 'w') as f:
+        f.attrs.update(
+            {
+                'FILE_TYPE': 'timeseries',
+                'LENGTH': str(data.shape[-2]),
+                'WIDTH': str(data.shape[-1]),
+                'X_FIRST': str(-160.0 + col * 0.01),
+                'Y_FIRST': str(54.0 - row * 0.01),
+                'X_STEP': '0.01',
+                'Y_STEP': '-0.01',
+                'REF_Y': str(ref[0]),
+                'REF_X': str(ref[1]),
+                'REF_DATE': ref_date,
+                'SUBSET_XMIN': str(col),
+            }
+        )
+        f.create_dataset('timeseries', data=data)
+        f.create_dataset('date', data=np.array([b'20200101', b'20200113', b'20200125']))
+
+
+def test_stitch_file(tmp_path):
+    rng = np.random.default_rng(0)
+    truth = np.cumsum(rng.normal(0, 0.01, (3, 40, 50)), axis=0).astype(np.float32)
+    truth -= truth[:, 5:6, 5:6]
+
+    windows = [(0, 0, 24, 30), (0, 20, 24, 50), (16, 0, 40, 30), (16, 20, 40, 50)]
+    refs = [(5, 5), (10, 10), (3, 20), (7, 7)]
+    tile_files = []
+    for index, ((r0, c0, r1, c1), ref) in enumerate(zip(windows, refs)):
+        data = truth[:, r0:r1, c0:c1]
+        data = data - data[:, ref[0] : ref[0] + 1, ref[1] : ref[1] + 1]
+        path = tmp_path / f'tile{index}.h5'
+        write_tile(path, data, r0, c0, ref)
+        tile_files.append(path)
+
+    output = tmp_path / 'timeseries.h5'
+    tiling.stitch_file(tile_files, output)
+
+    with h5py.File(output, 'r') as f:
+        assert f.attrs['LENGTH'] == '40'
+        assert f.attrs['WIDTH'] == '50'
+        assert f.attrs['REF_Y'] == '5'
+        assert f.attrs['REF_DATE'] == '20200101'
+        assert 'SUBSET_XMIN' not in f.attrs
+        assert f['date'].shape == (3,)
+        assert np.allclose(f['timeseries'][()], truth, atol=1e-5)
+
+
+def test_stitch_file_reference_date(tmp_path):
+    data = np.zeros((3, 10, 10), dtype=np.float32)
+    write_tile(tmp_path / 'tile0.h5', data, 0, 0, (5, 5))
+    write_tile(tmp_path / 'tile1.h5', data, 0, 8, (5, 5), ref_date='20200113')
+
+    with pytest.raises(ValueError, match='different dates'):
+        tiling.stitch_file([tmp_path / 'tile0.h5', tmp_path / 'tile1.h5'], tmp_path / 'timeseries.h5')
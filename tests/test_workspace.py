@@ -0,0 +1,76 @@
+import logging
+
+import pytest
+
+from hyp3_mintpy.workspace import Workspace, get_disk_usage
+
+
+def test_get_disk_usage(tmp_path):
+    assert get_disk_usage(tmp_path / 'missing') == 0
+
+    (tmp_path / 'a.bin').write_bytes(b'0' * 100_000)
+    assert get_disk_usage(tmp_path) >= 100_000
+
+
+def test_release(tmp_path):
+    tiffs = [tmp_path / 'unw.tif', tmp_path / 'corr.tif']
+    for tiff in tiffs:
+        tiff.write_bytes(b'0')
+
+    workspace = Workspace(tmp_path)
+    workspace.register(tiffs, ['load_data'])
+    workspace.register(tiffs[1:], ['screening'])
+
+    assert workspace.release('modify_network') == []
+    assert workspace.release('load_data') == [tiffs[0]]
+    assert not tiffs[0].exists()
+    assert tiffs[1].exists()
+
+    assert workspace.release('screening') == [tiffs[1]]
+    assert not tiffs[1].exists()
+
+
+def test_stage_budget(tmp_path, caplog):
+    workspace = Workspace(tmp_path, budget_gb=0.0001)
+
+    with workspace.stage('small'):
+        (tmp_path / 'a.bin').write_bytes(b'0' * 1000)
+    assert workspace.peaks['small'] >= 1000
+
+    with caplog.at_level(logging.WARNING, logger='hyp3_mintpy.workspace'), workspace.stage('large'):
+        (tmp_path / 'b.bin').write_bytes(b'0' * 200_000)
+    assert 'exceeded the budget' in caplog.text
+
+    with pytest.raises(RuntimeError, match='exceeds the budget'), workspace.stage('next'):
+        pass
+    assert 'next' not in workspace.peaks
+
+
+def test_step_done_budget(tmp_path):
+    workspace = Workspace(tmp_path, budget_gb=0.0001)
+    inputs = tmp_path / 'unw.tif'
+    inputs.write_bytes(b'0' * 1000)
+    workspace.register([inputs], ['load_data'])
+
+    assert workspace.step_done('load_data') == [inputs]
+
+    (tmp_path / 'ifgramStack.h5').write_bytes(b'0' * 200_000)
+    with pytest.raises(RuntimeError, match='exceeds the budget'):
+        workspace.step_done('modify_network')
+
+
+def test_hot_dir(tmp_path):
+    root = tmp_path / 'job'
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+
+    workspace = Workspace(root, scratch_dir=scratch)
+    hot = workspace.hot_dir('MintPy')
+    (hot / 'ifgramStack.h5').write_bytes(b'0' * 10_000)
+
+    assert hot.is_symlink()
+    assert (scratch / 'job_MintPy' / 'ifgramStack.h5').exists()
+    assert workspace.usage() >= 10_000
+
+    workspace.cleanup()
+    assert not (scratch / 'job_MintPy').exists()